@@ -102,7 +102,7 @@ def magnitude_to_amplitude(magnitude, mag_zero_point):
     :param mag_zero_point: zero point magnitude for the image
     :returns: source amplitude in counts per second
     """
-    delta_m = magnitude - mag_zero_point
+    delta_m = np.asarray(magnitude) - mag_zero_point
     counts = 10 ** (-delta_m / 2.5)
     return counts
 
@@ -1,7 +1,11 @@
+import functools
+import threading
+from collections import OrderedDict
 import numpy as np
 from lenstronomy.SimulationAPI.sim_api import SimAPI
 from astropy.visualization import make_lupton_rgb
 from lenstronomy.Data.psf import PSF
+from lenstronomy.Data.pixel_grid import PixelGrid
 from lenstronomy.ImSim.Numerics.point_source_rendering import PointSourceRendering
 from slsim.Util.param_util import (
     magnitude_to_amplitude,
@@ -9,6 +13,96 @@ from slsim.Util.param_util import (
     transformmatrix_to_pixelscale,
 )
 
+# least recently used SimAPI and image model pairs. Each entry holds the full
+# (supersampled) coordinate grids, so only a few are kept.
+_SIM_API_CACHE = OrderedDict()
+_SIM_API_CACHE_SIZE = 4
+_SIM_API_CACHE_LOCK = threading.Lock()
+
+
+def clear_image_model_cache():
+    """Removes all cached SimAPI and image model instances used by simulate_image()
+    and sharp_image()."""
+    with _SIM_API_CACHE_LOCK:
+        _SIM_API_CACHE.clear()
+
+
+def _hashable(obj):
+    """Converts nested dictionaries, lists and arrays into a hashable key.
+
+    :param obj: object to convert
+    :return: hashable representation of obj
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((key, _hashable(value)) for key, value in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_hashable(value) for value in obj)
+    if isinstance(obj, np.ndarray):
+        return obj.shape, obj.dtype.str, obj.tobytes()
+    return obj
+
+
+def _sim_api_and_image_model(
+    num_pix, kwargs_single_band, kwargs_model, kwargs_numerics
+):
+    """Returns a SimAPI instance and its image model for the given configuration.
+    Both only depend on the structural inputs (not on the lens parameters), so they
+    are cached and reused across calls with identical configurations.
+
+    :param num_pix: number of pixels per axis
+    :param kwargs_single_band: keyword arguments of the band configuration
+    :param kwargs_model: lenstronomy model keyword arguments
+    :param kwargs_numerics: numerics keyword arguments for the image model
+    :return: SimAPI instance, image model instance
+    """
+    key = (
+        num_pix,
+        _hashable(kwargs_single_band),
+        _hashable(kwargs_model),
+        _hashable(kwargs_numerics),
+    )
+    with _SIM_API_CACHE_LOCK:
+        cached = _SIM_API_CACHE.get(key)
+        if cached is not None:
+            _SIM_API_CACHE.move_to_end(key)
+            return cached
+        sim_api = SimAPI(
+            numpix=num_pix,
+            kwargs_single_band=kwargs_single_band,
+            kwargs_model=kwargs_model,
+        )
+        cached = (sim_api, sim_api.image_model_class(kwargs_numerics))
+        _SIM_API_CACHE[key] = cached
+        if len(_SIM_API_CACHE) > _SIM_API_CACHE_SIZE:
+            _SIM_API_CACHE.popitem(last=False)
+    return cached
+
+
+def _pixel_psf_class(psf_kernel):
+    """Returns a pixel PSF class for the given kernel. PSF classes are cached by kernel
+    content, so the kernel preprocessing is only done once for repeated kernels.
+
+    :param psf_kernel: psf kernel
+    :return: lenstronomy PSF() instance
+    """
+    psf_kernel = np.asarray(psf_kernel)
+    return _cached_pixel_psf_class(
+        psf_kernel.tobytes(), psf_kernel.shape, psf_kernel.dtype.str
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_pixel_psf_class(kernel_bytes, kernel_shape, kernel_dtype):
+    """Creates a pixel PSF class from a serialized kernel.
+
+    :param kernel_bytes: raw bytes of the psf kernel
+    :param kernel_shape: shape of the psf kernel
+    :param kernel_dtype: dtype string of the psf kernel
+    :return: lenstronomy PSF() instance
+    """
+    psf_kernel = np.frombuffer(kernel_bytes, dtype=kernel_dtype).reshape(kernel_shape)
+    return PSF(psf_type="PIXEL", kernel_point_source=psf_kernel.copy())
+
 
 def simulate_image(
     lens_class, band, num_pix, add_noise=True, observatory="LSST", **kwargs
@@ -34,19 +128,21 @@ def simulate_image(
         observatory=observatory, band=band, **kwargs
     )
 
-    sim_api = SimAPI(
-        numpix=num_pix, kwargs_single_band=kwargs_single_band, kwargs_model=kwargs_model
+    kwargs_numerics = {
+        "point_source_supersampling_factor": 1,
+        "supersampling_factor": 3,
+    }
+    sim_api, image_model = _sim_api_and_image_model(
+        num_pix=num_pix,
+        kwargs_single_band=kwargs_single_band,
+        kwargs_model=kwargs_model,
+        kwargs_numerics=kwargs_numerics,
     )
     kwargs_lens_light, kwargs_source, kwargs_ps = sim_api.magnitude2amplitude(
         kwargs_lens_light_mag=kwargs_params.get("kwargs_lens_light", None),
         kwargs_source_mag=kwargs_params.get("kwargs_source", None),
         kwargs_ps_mag=kwargs_params.get("kwargs_ps", None),
     )
-    kwargs_numerics = {
-        "point_source_supersampling_factor": 1,
-        "supersampling_factor": 3,
-    }
-    image_model = sim_api.image_model_class(kwargs_numerics)
     kwargs_lens = kwargs_params.get("kwargs_lens", None)
     image = image_model.image(
         kwargs_lens=kwargs_lens,
@@ -59,6 +155,52 @@ def simulate_image(
     return image
 
 
+def _sharp_sim_api_and_image_model(kwargs_model, delta_pix, num_pix):
+    """Returns the (cached) SimAPI instance and image model used for unconvolved
+    images. They are set up with a zero point of 0, so that exposures with different
+    zero points share the cache entry; magnitudes are passed relative to the zero
+    point instead, see sharp_image().
+
+    :param kwargs_model: lenstronomy model keyword arguments
+    :param delta_pix: pixel scale of image generated
+    :param num_pix: number of pixels per axis
+    :return: SimAPI instance, image model instance
+    """
+    kwargs_band = {
+        "pixel_scale": delta_pix,
+        "magnitude_zero_point": 0,
+        "background_noise": 0,  # these are keywords not being used but need to be
+        ## set in SimAPI
+        "psf_type": "NONE",  # these are keywords not being used but need to be set
+        ##in SimAPI
+        "exposure_time": 1,
+    }  # these are keywords not being used but need to be set in
+    ##SimAPI
+    kwargs_numerics = {"supersampling_factor": 1}
+    return _sim_api_and_image_model(
+        num_pix=num_pix,
+        kwargs_single_band=kwargs_band,
+        kwargs_model=kwargs_model,
+        kwargs_numerics=kwargs_numerics,
+    )
+
+
+def _relative_magnitudes(kwargs_list, mag_zero_point):
+    """Returns a copy of lenstronomy light keyword arguments with the 'magnitude'
+    given relative to the magnitude zero point.
+
+    :param kwargs_list: list of light model keyword arguments with 'magnitude', or None
+    :param mag_zero_point: magnitude zero point in band
+    :return: list of keyword arguments, or None
+    """
+    if kwargs_list is None:
+        return None
+    return [
+        dict(kwargs, magnitude=kwargs["magnitude"] - mag_zero_point)
+        for kwargs in kwargs_list
+    ]
+
+
 def sharp_image(
     lens_class,
     band,
@@ -81,32 +223,27 @@ def sharp_image(
     :return: 2d array unblurred image
     """
     kwargs_model, kwargs_params = lens_class.lenstronomy_kwargs(band)
-    kwargs_band = {
-        "pixel_scale": delta_pix,
-        "magnitude_zero_point": mag_zero_point,
-        "background_noise": 0,  # these are keywords not being used but need to be
-        ## set in SimAPI
-        "psf_type": "NONE",  # these are keywords not being used but need to be set
-        ##in SimAPI
-        "exposure_time": 1,
-    }  # these are keywords not being used but need to be set in
-    ##SimAPI
-    sim_api = SimAPI(
-        numpix=num_pix, kwargs_single_band=kwargs_band, kwargs_model=kwargs_model
+    sim_api, image_model = _sharp_sim_api_and_image_model(
+        kwargs_model=kwargs_model,
+        delta_pix=delta_pix,
+        num_pix=num_pix,
     )
-    kwargs_lens_light, kwargs_source, kwargs_ps = sim_api.magnitude2amplitude(
-        kwargs_lens_light_mag=kwargs_params.get("kwargs_lens_light", None),
-        kwargs_source_mag=kwargs_params.get("kwargs_source", None),
-        kwargs_ps_mag=kwargs_params.get("kwargs_ps", None),
+    # the cached model has a zero point of 0, so the magnitudes are given relative to
+    # the zero point of this image. Point sources are not rendered here.
+    kwargs_lens_light, kwargs_source, _ = sim_api.magnitude2amplitude(
+        kwargs_lens_light_mag=_relative_magnitudes(
+            kwargs_params.get("kwargs_lens_light", None), mag_zero_point
+        ),
+        kwargs_source_mag=_relative_magnitudes(
+            kwargs_params.get("kwargs_source", None), mag_zero_point
+        ),
     )
-    kwargs_numerics = {"supersampling_factor": 1}
-    image_model = sim_api.image_model_class(kwargs_numerics)
     kwargs_lens = kwargs_params.get("kwargs_lens", None)
     image = image_model.image(
         kwargs_lens=kwargs_lens,
         kwargs_source=kwargs_source,
         kwargs_lens_light=kwargs_lens_light,
-        kwargs_ps=kwargs_ps,
+        kwargs_ps=None,
         unconvolved=True,
         source_add=with_source,
         lens_light_add=with_deflector,
@@ -126,27 +263,16 @@ def sharp_rgb_image(lens_class, rgb_band_list, mag_zero_point, delta_pix, num_pi
     :param num_pix: number of pixels per axis
     :return: rgb image
     """
-    image_r = sharp_image(
-        lens_class=lens_class,
-        band=rgb_band_list[0],
-        mag_zero_point=mag_zero_point,
-        delta_pix=delta_pix,
-        num_pix=num_pix,
-    )
-    image_g = sharp_image(
-        lens_class=lens_class,
-        band=rgb_band_list[1],
-        mag_zero_point=mag_zero_point,
-        delta_pix=delta_pix,
-        num_pix=num_pix,
-    )
-    image_b = sharp_image(
-        lens_class=lens_class,
-        band=rgb_band_list[2],
-        mag_zero_point=mag_zero_point,
-        delta_pix=delta_pix,
-        num_pix=num_pix,
-    )
+    image_r, image_g, image_b = [
+        sharp_image(
+            lens_class=lens_class,
+            band=band,
+            mag_zero_point=mag_zero_point,
+            delta_pix=delta_pix,
+            num_pix=num_pix,
+        )
+        for band in rgb_band_list[:3]
+    ]
     image_rgb = make_lupton_rgb(image_r, image_g, image_b, stretch=0.5)
     return image_rgb
 
@@ -190,6 +316,19 @@ def centered_coordinate_system(num_pix, transform_pix2angle):
     return kwargs_grid
 
 
+def _pixel_grid(num_pix, transform_pix2angle):
+    """Provides a centered pixel grid. Unlike image_data_class(), this does not set up
+    a SimAPI and only carries the coordinate transforms.
+
+    :param num_pix: number of pixels per axis
+    :param transform_pix2angle: transformation matrix (2x2) of pixels into coordinate
+        displacements
+    :return: lenstronomy PixelGrid() instance
+    """
+    kwargs_grid = centered_coordinate_system(num_pix, transform_pix2angle)
+    return PixelGrid(nx=num_pix, ny=num_pix, **kwargs_grid)
+
+
 def image_data_class(
     lens_class, band, mag_zero_point, delta_pix, num_pix, transform_pix2angle
 ):
@@ -239,32 +378,57 @@ def point_source_coordinate_properties(
         coordinate properties.
     """
 
-    image_data = image_data_class(
-        lens_class, band, mag_zero_point, delta_pix, num_pix, transform_pix2angle
-    )
+    pixel_grid = _pixel_grid(num_pix, transform_pix2angle)
 
     lens_center = lens_class.deflector_position
     ra_lens_value = lens_center[0]
     dec_lens_value = lens_center[1]
-    lens_pix_coordinate = image_data.map_coord2pix(ra_lens_value, dec_lens_value)
+    lens_pix_coordinate = pixel_grid.map_coord2pix(ra_lens_value, dec_lens_value)
 
     ps_coordinate = lens_class.point_source_image_positions()
     ra_image_values = ps_coordinate[0]
     dec_image_values = ps_coordinate[1]
     # image_magnitude = lens_class.point_source_magnitude(band=band, lensed=True)
-    image_pix_coordinate = []
-    for image_ra, image_dec in zip(ra_image_values, dec_image_values):
-        image_pix_coordinate.append((image_data.map_coord2pix(image_ra, image_dec)))
+    image_pix_coordinate = np.stack(
+        pixel_grid.map_coord2pix(
+            np.asarray(ra_image_values), np.asarray(dec_image_values)
+        ),
+        axis=-1,
+    )
 
     data = {
         "deflector_pix": np.array(lens_pix_coordinate),
-        "image_pix": np.array(image_pix_coordinate),
+        "image_pix": image_pix_coordinate,
         "ra_image": ra_image_values,
         "dec_image": dec_image_values,
     }
     return data
 
 
+def _render_point_sources(
+    ra_image, dec_image, amplitude, num_pix, psf_kernel, transform_pix2angle
+):
+    """Renders point sources with a pixel psf on a centered pixel grid.
+
+    :param ra_image: ra coordinates of the point sources
+    :param dec_image: dec coordinates of the point sources
+    :param amplitude: amplitudes of the point sources
+    :param num_pix: number of pixels per axis
+    :param psf_kernel: psf kernel for the image
+    :param transform_pix2angle: transformation matrix (2x2) of pixels into coordinate
+        displacements
+    :return: image of the point sources
+    """
+    rendering_class = PointSourceRendering(
+        pixel_grid=_pixel_grid(num_pix, transform_pix2angle),
+        supersampling_factor=1,
+        psf=_pixel_psf_class(psf_kernel),
+    )
+    return rendering_class.point_source_rendering(
+        np.asarray(ra_image), np.asarray(dec_image), np.ravel(amplitude)
+    )
+
+
 def point_source_image_without_variability(
     lens_class,
     band,
@@ -290,36 +454,18 @@ def point_source_image_without_variability(
     kwargs_model, kwargs_params = lens_class.lenstronomy_kwargs(band=band)
     kwargs_ps = kwargs_params["kwargs_ps"]
 
-    data_class = image_data_class(
-        lens_class, band, mag_zero_point, delta_pix, num_pix, transform_pix2angle
-    )
-
-    psf_class = PSF(psf_type="PIXEL", kernel_point_source=psf_kernel)
     if kwargs_ps is not None:
-        image_data = point_source_coordinate_properties(
-            lens_class=lens_class,
-            band=band,
-            mag_zero_point=mag_zero_point,
-            delta_pix=delta_pix,
+        ra_image_values, dec_image_values = lens_class.point_source_image_positions()
+        magnitude = lens_class.point_source_magnitude(band, lensed=True)
+        amp = magnitude_to_amplitude(magnitude, mag_zero_point)
+        point_source_image = _render_point_sources(
+            ra_image_values,
+            dec_image_values,
+            amp,
             num_pix=num_pix,
+            psf_kernel=psf_kernel,
             transform_pix2angle=transform_pix2angle,
         )
-        ra_image_values = image_data["ra_image"]
-        dec_image_values = image_data["dec_image"]
-        magnitude = lens_class.point_source_magnitude(band, lensed=True)
-        amp = magnitude_to_amplitude(magnitude, mag_zero_point)
-        point_source_images_list = []
-        for i in range(len(ra_image_values)):
-            rendering_class = PointSourceRendering(
-                pixel_grid=data_class, supersampling_factor=1, psf=psf_class
-            )
-            point_source = rendering_class.point_source_rendering(
-                np.array([ra_image_values[i]]),
-                np.array([dec_image_values[i]]),
-                np.array([amp[i]]),
-            )
-            point_source_images_list.append(point_source)
-        point_source_image = sum(point_source_images_list)
     else:
         point_source_image = np.zeros((num_pix, num_pix))
     return point_source_image
@@ -352,39 +498,21 @@ def point_source_image_at_time(
 
     kwargs_model, kwargs_params = lens_class.lenstronomy_kwargs(band=band)
     kwargs_ps = kwargs_params["kwargs_ps"]
-    data_class = image_data_class(
-        lens_class, band, mag_zero_point, delta_pix, num_pix, transform_pix2angle
-    )
-
-    psf_class = PSF(psf_type="PIXEL", kernel_point_source=psf_kernel)
 
     if kwargs_ps is not None:
-        image_data = point_source_coordinate_properties(
-            lens_class=lens_class,
-            band=band,
-            mag_zero_point=mag_zero_point,
-            delta_pix=delta_pix,
-            num_pix=num_pix,
-            transform_pix2angle=transform_pix2angle,
-        )
-        ra_image_values = image_data["ra_image"]
-        dec_image_values = image_data["dec_image"]
+        ra_image_values, dec_image_values = lens_class.point_source_image_positions()
         variable_mag = lens_class.point_source_magnitude(
             band=band, lensed=True, time=time
         )
         variable_amp = magnitude_to_amplitude(variable_mag, mag_zero_point)
-        point_source_images_list = []
-        for i in range(len(ra_image_values)):
-            rendering_class = PointSourceRendering(
-                pixel_grid=data_class, supersampling_factor=1, psf=psf_class
-            )
-            point_source = rendering_class.point_source_rendering(
-                np.array([ra_image_values[i]]),
-                np.array([dec_image_values[i]]),
-                np.array([variable_amp[i]]),
-            )
-            point_source_images_list.append(point_source)
-        point_source_image = sum(point_source_images_list)
+        point_source_image = _render_point_sources(
+            ra_image_values,
+            dec_image_values,
+            variable_amp,
+            num_pix=num_pix,
+            psf_kernel=psf_kernel,
+            transform_pix2angle=transform_pix2angle,
+        )
     else:
         point_source_image = np.zeros((num_pix, num_pix))
     return point_source_image
@@ -414,28 +542,28 @@ def point_source_image_with_variability(
     :param t_obs: array of image observation time [day].
     :return: array of point source images with variability
     """
-    all_image = []
-    for time, psf_kernel, mag_zero, transf_matrix in zip(
-        t_obs, psf_kernels, mag_zero_point, transform_pix2angle
-    ):
-        image_test = point_source_image_at_time(
-            lens_class,
-            band=band,
-            mag_zero_point=mag_zero,
-            delta_pix=delta_pix,
-            num_pix=num_pix,
-            psf_kernel=psf_kernel,
-            transform_pix2angle=transf_matrix,
-            time=time,
+    kwargs_model, kwargs_params = lens_class.lenstronomy_kwargs(band=band)
+    kwargs_ps = kwargs_params["kwargs_ps"]
+
+    # exposures are paired up like zip() does, i.e. truncated to the shortest input
+    exposures = list(zip(t_obs, psf_kernels, mag_zero_point, transform_pix2angle))
+    images = np.zeros((len(exposures), num_pix, num_pix))
+    if kwargs_ps is not None and len(exposures) > 0:
+        ra_image_values, dec_image_values = lens_class.point_source_image_positions()
+        # magnitudes of all images at all observation times, shape (n_image, n_time)
+        variable_mag = lens_class.point_source_magnitude(
+            band=band, lensed=True, time=np.array([time for time, *_ in exposures])
         )
-        all_image.append(image_test)
-    variab_images = [list(x) for x in zip(*all_image)]
-    image = np.array(variab_images)
-    n = len(image)
-    subarray_shape = image[0].shape
-    results = np.zeros(subarray_shape)
-    for i in range(n):
-        results += image[i]
+        for i, (_, psf_kernel, mag_zero, transf_matrix) in enumerate(exposures):
+            images[i] = _render_point_sources(
+                ra_image_values,
+                dec_image_values,
+                magnitude_to_amplitude(variable_mag[:, i], mag_zero),
+                num_pix=num_pix,
+                psf_kernel=psf_kernel,
+                transform_pix2angle=transf_matrix,
+            )
+    results = np.sum(images, axis=1)
     return results
 
 
@@ -12,6 +12,7 @@ from slsim.ParamDistributions.gaussian_mixture_model import GaussianMixtureModel
 from lenstronomy.Util import util, data_util
 from slsim.lensed_system_base import LensedSystemBase
 import warnings
+from astropy import units as u
 
 
 class Lens(LensedSystemBase):
@@ -404,22 +405,17 @@ class Lens(LensedSystemBase):
         image.
 
         :param t_obs: time of observation [days]. It could be a single observation time
-            or an array of observation time.
+            or an array of observation time. Astropy quantities with time units are
+            converted to days.
         :return: time of the source when seen in the different images (without redshift
             correction)
         :rtype: numpy array. Each element of the array corresponds to different image
             observation times.
         """
         arrival_times = self.point_source_arrival_times()
-        if type(t_obs) is np.ndarray and len(t_obs) > 1:
-            observer_times = (
-                t_obs[:, np.newaxis] + arrival_times - np.min(arrival_times)
-            ).T
-        else:
-            observer_times = (t_obs + arrival_times - np.min(arrival_times))[
-                :, np.newaxis
-            ]
-
+        relative_arrival_times = arrival_times - np.min(arrival_times)
+        t_obs = np.atleast_1d(u.Quantity(t_obs, u.day).value)
+        observer_times = relative_arrival_times[:, np.newaxis] + t_obs[np.newaxis, :]
         return observer_times
 
     def point_source_magnitude(self, band, lensed=False, time=None):
@@ -453,10 +449,8 @@ class Lens(LensedSystemBase):
                 return lensed_variable_magnitude
             else:
                 source_mag_unlensed = self.source.point_source_magnitude(band)
-                magnified_mag_list = []
-                for i in range(len(magnif_log)):
-                    magnified_mag_list.append(source_mag_unlensed - magnif_log[i])
-                return np.array(magnified_mag_list)
+                # one entry per image: source_mag_unlensed - magnif_log[i]
+                return np.add.outer(-magnif_log, np.asarray(source_mag_unlensed))
         return self.source.point_source_magnitude(band)
 
     def extended_source_magnitude(self, band, lensed=False):
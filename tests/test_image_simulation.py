@@ -1,8 +1,10 @@
 import os
 import numpy as np
+import numpy.testing as npt
 from astropy.table import Table
 from astropy.cosmology import FlatLambdaCDM
 from slsim.lens import Lens
+from slsim.Observations.image_quality_lenstronomy import kwargs_single_band
 from slsim.image_simulation import (
     simulate_image,
     sharp_image,
@@ -19,6 +21,11 @@ from slsim.image_simulation import (
     image_plus_poisson_noise_for_list_of_image,
     lens_image,
     lens_image_series,
+    clear_image_model_cache,
+    _SIM_API_CACHE,
+    _sim_api_and_image_model,
+    _pixel_psf_class,
+    _pixel_grid,
 )
 import pytest
 
@@ -59,6 +66,23 @@ class TestImageSimulation(object):
         )
         assert len(image) == 100
 
+    def test_sim_api_and_image_model_cache(self):
+        kwargs_model, _ = self.gg_lens.lenstronomy_kwargs("g")
+        kwargs = dict(
+            num_pix=50,
+            kwargs_single_band=kwargs_single_band(observatory="LSST", band="g"),
+            kwargs_model=kwargs_model,
+            kwargs_numerics={"supersampling_factor": 1},
+        )
+        sim_api_1, image_model_1 = _sim_api_and_image_model(**kwargs)
+        sim_api_2, image_model_2 = _sim_api_and_image_model(**kwargs)
+        assert sim_api_1 is sim_api_2
+        assert image_model_1 is image_model_2
+        clear_image_model_cache()
+        sim_api_3, image_model_3 = _sim_api_and_image_model(**kwargs)
+        assert sim_api_3 is not sim_api_1
+        assert image_model_3 is not image_model_1
+
     def test_sharp_image(self):
         image = sharp_image(
             lens_class=self.gg_lens,
@@ -108,6 +132,8 @@ class TestImageSimulation(object):
         image_list = [image_r, image_g, image_b]
         image = rgb_image_from_image_list(image_list, 0.5)
         assert len(image) == 100
+        image_2 = rgb_image_from_image_list(image_list, np.array(0.5))
+        npt.assert_array_equal(image_2, image)
 
     def test_point_source_image_with_lens_class_with_no_point_source(self):
         transf_matrix = np.array([[0.2, 0], [0, 0.2]])
@@ -191,6 +217,23 @@ def test_image_data_class(pes_lens_instance):
     assert results == 50
 
 
+def test_pixel_grid(pes_lens_instance):
+    transform_matrix = np.array([[0.2, 0], [0, 0.2]])
+    pixel_grid = _pixel_grid(num_pix=101, transform_pix2angle=transform_matrix)
+    data_class = image_data_class(
+        lens_class=pes_lens_instance,
+        band="i",
+        mag_zero_point=27,
+        delta_pix=0.2,
+        num_pix=101,
+        transform_pix2angle=transform_matrix,
+    )
+    assert pixel_grid._x_at_radec_0 == 50
+    npt.assert_almost_equal(
+        pixel_grid.map_coord2pix(1.0, -0.5), data_class.map_coord2pix(1.0, -0.5)
+    )
+
+
 def test_point_source_image_properties(pes_lens_instance):
     transform_matrix = np.array([[0.2, 0], [0, 0.2]])
     lens_class = pes_lens_instance
@@ -269,6 +312,46 @@ def test_point_source_image_with_and_without_variability(pes_lens_instance):
     assert result2.shape[0] == 101
     assert len(result3) == len(t_obs)
 
+    result4 = point_source_image_with_variability(
+        lens_class=lens_class,
+        band="i",
+        mag_zero_point=mag_zero_points,
+        delta_pix=0.2,
+        num_pix=101,
+        psf_kernels=psf_kernels,
+        transform_pix2angle=transform_matrix,
+        t_obs=t_obs[:2],
+    )
+    assert result4.shape == (2, 101)
+    npt.assert_allclose(result4, result3[:2])
+
+
+def test_pixel_psf_class():
+    path = os.path.dirname(__file__)
+    psf_kernel = np.load(os.path.join(path, "TestData/psf_kernels_for_image_1.npy"))
+    psf_class_1 = _pixel_psf_class(psf_kernel)
+    psf_class_2 = _pixel_psf_class(psf_kernel.copy())
+    assert psf_class_1 is psf_class_2
+    npt.assert_almost_equal(
+        psf_class_1.kernel_point_source, psf_kernel / np.sum(psf_kernel)
+    )
+
+
+def test_sharp_image_cache_independent_of_zeropoint(pes_lens_instance):
+    clear_image_model_cache()
+    mag_zero_points = np.linspace(26, 30, 10)
+    images = deflector_images_with_different_zeropoint(
+        lens_class=pes_lens_instance,
+        band="i",
+        mag_zero_point=mag_zero_points,
+        delta_pix=0.2,
+        num_pix=64,
+    )
+    assert len(_SIM_API_CACHE) == 1
+    npt.assert_allclose(
+        images[-1], images[0] * 10 ** ((mag_zero_points[-1] - mag_zero_points[0]) / 2.5)
+    )
+
 
 def test_deflector_images_with_different_zeropoint(pes_lens_instance):
     lens_class = pes_lens_instance
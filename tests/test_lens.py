@@ -3,6 +3,7 @@ import numpy as np
 from numpy import testing as npt
 from astropy.cosmology import FlatLambdaCDM
 from astropy.table import Table
+from astropy import units as u
 from slsim.Deflectors.deflector import Deflector
 from slsim.lens import (
     Lens,
@@ -116,6 +117,10 @@ class TestLens(object):
         ).T
         npt.assert_almost_equal(dt_days, observer_times, decimal=5)
         npt.assert_almost_equal(dt_days2, observer_times2, decimal=5)
+        dt_days3 = self.gg_lens.image_observer_times(t_obs=list(t_obs2))
+        npt.assert_almost_equal(dt_days3, observer_times2, decimal=5)
+        dt_days4 = self.gg_lens.image_observer_times(t_obs=t_obs2 * 24 * 60 * u.minute)
+        npt.assert_almost_equal(dt_days4, observer_times2, decimal=5)
 
     def test_deflector_light_model_lenstronomy(self):
         kwargs_lens_light = self.gg_lens.deflector_light_model_lenstronomy(band="g")